@@ -36,15 +36,18 @@ import csv
 import sys
 import gzip
 import shutil
-import json
+import functools
+import sqlite3
+import threading
 from pathlib import Path
 
+import numpy as np
 from lodstorage.entity import EntityManager
 from lodstorage.storageconfig import StorageConfig, StoreMode
 from sklearn.neighbors import BallTree
 from geograpy.wikidata import Wikidata
 from lodstorage.sql import SQLDB
-from geograpy.utils import remove_non_ascii
+from geograpy.utils import remove_non_ascii, normalize_name, load_json
 from geograpy import wikidata
 from argparse import ArgumentParser
 from argparse import RawDescriptionHelpFormatter
@@ -56,6 +59,11 @@ class LocationManager(EntityManager):
     '''
     a list of locations
     '''
+    # up to this number of locations a vectorized scan over all distances is faster than a BallTree query
+    bruteForceLimit = 2000
+    # wikidata ids referencing other locations - the same few thousand region and country ids
+    # are repeated for every city so they are interned on load to share a single str object per id
+    foreignKeyAttrs = ["regionId", "countryId", "partOfRegionId"]
     
     def __init__(self, name:str, entityName:str, entityPluralName:str, listName:str=None, tableName:str=None,clazz=None, primaryKey:str=None, config:StorageConfig=None, handleInvalidListTypes=True, filterInvalidListTypes=False, debug=False):
         '''
@@ -85,11 +93,48 @@ class LocationManager(EntityManager):
                           handleInvalidListTypes=handleInvalidListTypes,
                           filterInvalidListTypes=filterInvalidListTypes,
                           debug=debug)
-        self.balltree = None
+        self.clearColumnCaches()
         self.locationByWikidataID={}
+        self.lookupThreadLocal=threading.local()
         if config is not None and config.mode==StoreMode.SQL:
             self.sqldb=self.getSQLDB(config.cacheFile)
 
+    def clearColumnCaches(self):
+        '''
+        clear the column arrays and the structures derived from them
+        needs to be called whenever my list of locations changes
+        '''
+        self.columns = None
+        self.coordinatesTuple = None
+        self.ballTuple = None
+        self.nameTrigramIndex = None
+        
+    def getColumns(self, cache:bool=True) -> dict:
+        '''
+        get a column oriented view of my locations as numpy arrays
+        
+        Args:
+            cache(bool): if True calculate and use a cached version otherwise recalculate on
+            every call of this function
+            
+        Returns:
+            dict: the lat/lon float arrays (nan if not available) and the wikidataid/name object arrays
+            in the order of my list of locations
+        '''
+        if self.columns is None or not cache:
+            locations = self.getList()
+            count = len(locations)
+            columns = {}
+            for columnName in ["lat", "lon"]:
+                values = (getattr(location, columnName, None) for location in locations)
+                columns[columnName] = np.fromiter((np.nan if value is None else value for value in values), dtype=np.float64, count=count)
+            for columnName in ["wikidataid", "name"]:
+                column = np.empty(count, dtype=object)
+                column[:] = [getattr(location, columnName, None) for location in locations]
+                columns[columnName] = column
+            self.columns = columns
+        return self.columns
+        
     def getBallTuple(self, cache:bool=True):
         '''
         get the BallTuple=BallTree,validList of this location list
@@ -102,26 +147,254 @@ class LocationManager(EntityManager):
             BallTree,list: a sklearn.neighbors.BallTree for the given list of locations, list: the valid list of locations
             list: valid list of locations
         '''
-        validList = []
-        if self.balltree is None or not cache:
-            coordinatesrad = []
-            for location in self.getList():
-                if location.lat and location.lon:
-                    latlonrad = (radians(location.lat), radians(location.lon))
-                    coordinatesrad.append(latlonrad)
-                    validList.append(location)
+        if self.ballTuple is None or not cache:
+            coordinatesrad, validList = self.getCoordinatesTuple(cache)
             self.ballTuple = BallTree(coordinatesrad, metric='haversine'), validList
         return self.ballTuple
     
+    def getCoordinatesTuple(self, cache:bool=True):
+        '''
+        get the CoordinatesTuple=coordinates,validList of this location list
+        
+        Args:
+            cache(bool): if True calculate and use a cached version otherwise recalculate on
+            every call of this function
+            
+        Returns:
+            ndarray,list: the (n,2) array of latitude/longitude in radians and the valid list of locations
+        '''
+        if self.coordinatesTuple is None or not cache:
+            columns = self.getColumns(cache)
+            lat, lon = columns["lat"], columns["lon"]
+            validIndices = self.getValidIndices(lat, lon)
+            locations = self.getList()
+            validList = [locations[index] for index in validIndices]
+            coordinates = np.column_stack((lat[validIndices], lon[validIndices]))
+            self.coordinatesTuple = np.radians(coordinates), validList
+        return self.coordinatesTuple
+    
+    @staticmethod
+    def getValidIndices(lat, lon):
+        '''
+        get the indices of the valid coordinates - a location is valid if it has a nonzero latitude and longitude
+        
+        Args:
+            lat(ndarray): the latitudes (nan if not available)
+            lon(ndarray): the longitudes (nan if not available)
+            
+        Returns:
+            ndarray: the indices of the valid coordinates
+        '''
+        validIndices = np.flatnonzero((lat != 0) & (lon != 0) & ~np.isnan(lat) & ~np.isnan(lon))
+        return validIndices
+    
+    def getNClosestLocationsFor(self, locations:list, n:int, dualtree:bool=False, breadthFirst:bool=True):
+        '''
+        get the n closest locations of mine for each of the given locations
+        with a single query of my cached BallTree
+        
+        Args:
+            locations(list): the locations to find my closest locations for
+            n(int): the maximum number of closest locations to return per location
+            dualtree(bool): if True also build a tree of the query points and traverse both trees
+            breadthFirst(bool): if True traverse my tree breadth first otherwise depth first
+            
+        Returns:
+            list: a list of result Location/distance tuples for each of the given locations - empty for
+            locations without valid coordinates
+        '''
+        balltree, lookupListOfLocations = self.getBallTuple()
+        results = [[] for _location in locations]
+        coordinates = {}
+        for columnName in ["lat", "lon"]:
+            values = (getattr(location, columnName, None) for location in locations)
+            coordinates[columnName] = np.fromiter((np.nan if value is None else value for value in values), dtype=np.float64, count=len(locations))
+        validIndices = self.getValidIndices(coordinates["lat"], coordinates["lon"])
+        if len(validIndices) == 0:
+            return results
+        # check for n+1 entries since we might have the location itself in the lookup list which we'll ignore later
+        k = min(n + 1, len(lookupListOfLocations))
+        points = np.radians(np.column_stack((coordinates["lat"][validIndices], coordinates["lon"][validIndices])))
+        distances, indices = balltree.query(points, k=k, return_distance=True, dualtree=dualtree, breadth_first=breadthFirst, sort_results=True)
+        for index, locationDistances, locationIndices in zip(validIndices, distances, indices):
+            results[index] = locations[index].balltreeQueryResultToLocationManager(locationDistances, locationIndices, lookupListOfLocations)
+        return results
+    
+    def useBallTree(self) -> bool:
+        '''
+        check whether single point queries should use my BallTree or a vectorized scan over all distances
+        
+        Returns:
+            bool: True if I have more valid locations than the bruteForceLimit
+        '''
+        _coordinatesrad, validList = self.getCoordinatesTuple()
+        return len(validList) > self.bruteForceLimit
+    
+    def getAngularDistances(self, lat:float, lon:float):
+        '''
+        get the great circle distances of the given point to all my valid locations
+        in a single vectorized haversine pass
+        
+        Args:
+            lat(float): the latitude in degrees
+            lon(float): the longitude in degrees
+            
+        Returns:
+            ndarray,list: the distances in radians (multiply by Earth.radius for km) and the valid list of locations
+        '''
+        coordinatesrad, validList = self.getCoordinatesTuple()
+        latrad, lonrad = radians(lat), radians(lon)
+        lookupLatrad = coordinatesrad[:, 0]
+        dlat = lookupLatrad - latrad
+        dlon = coordinatesrad[:, 1] - lonrad
+        a = np.sin(dlat / 2) ** 2 + cos(latrad) * np.cos(lookupLatrad) * np.sin(dlon / 2) ** 2
+        distances = 2 * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+        return distances, validList
+    
     def fromCache(self,force=False,getListOfDicts=None,sampleRecordCount=-1):
         '''
         get me from the cache
         '''
         super().fromCache(force, getListOfDicts, sampleRecordCount)
+        self.clearColumnCaches()
         self.locationByWikidataID={}
         for entry in self.getList():
             self.locationByWikidataID[entry.wikidataid]=entry
+            self.internForeignKeys(entry)
+            
+    def internForeignKeys(self, location):
+        '''
+        intern the foreign key wikidata ids of the given location
+        
+        Args:
+            location(Location): the location to intern the foreign keys for
+        '''
+        attrs = location.__dict__
+        for attr in self.foreignKeyAttrs:
+            value = attrs.get(attr)
+            if type(value) is str:
+                attrs[attr] = sys.intern(value)
 
+    def getLookup(self, attrName:str, withDuplicates:bool=False):
+        '''
+        create a lookup dictionary by the given attribute name in a single pass over my locations
+        
+        Args:
+            attrName(str): the attribute to lookup
+            withDuplicates(bool): whether to retain single values or lists
+        
+        Return:
+            a dictionary for lookup or a tuple dictionary,list of duplicates depending on withDuplicates
+        '''
+        lookup = {}
+        duplicates = []
+        addDuplicate = duplicates.append
+        lookupGet = lookup.get
+        for location in self.getList():
+            if isinstance(location, dict):
+                value = location.get(attrName)
+            else:
+                value = getattr(location, attrName, None)
+            if value is None:
+                continue
+            for value in (value if isinstance(value, list) else (value,)):
+                entry = lookupGet(value)
+                if entry is None:
+                    lookup[value] = [location] if withDuplicates else location
+                elif withDuplicates:
+                    entry.append(location)
+                else:
+                    addDuplicate(location)
+        if withDuplicates:
+            return lookup
+        return lookup, duplicates
+    
+    def getRecordDuplicates(self, precision:int=4) -> list:
+        '''
+        get the locations that repeat the name and coordinates of an earlier location under a different wikidataid
+        e.g. from merged Wikidata query results
+        
+        Args:
+            precision(int): the number of decimal places of the coordinates to compare (4 is about 10 m)
+            
+        Returns:
+            list: the duplicate locations in the order of my list of locations
+        '''
+        columns = self.getColumns()
+        lats = np.round(columns["lat"], precision).tolist()
+        lons = np.round(columns["lon"], precision).tolist()
+        wikidataIdByKey = {}
+        duplicates = []
+        for location, name, wikidataid, lat, lon in zip(self.getList(), columns["name"], columns["wikidataid"], lats, lons):
+            # nan never equals itself so locations without coordinates are skipped
+            if name is None or lat != lat or lon != lon:
+                continue
+            key = (name, lat, lon)
+            firstWikidataId = wikidataIdByKey.setdefault(key, wikidataid)
+            if firstWikidataId != wikidataid:
+                duplicates.append(location)
+        return duplicates
+    
+    @staticmethod
+    def getTrigrams(name:str) -> set:
+        '''
+        get the character trigrams of the lowercase ascii folded and space padded given name
+        
+        Args:
+            name(str): the name to get the trigrams for
+            
+        Returns:
+            set: the trigrams
+        '''
+        padded = f" {normalize_name(name)} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+    
+    def getNameTrigramIndex(self):
+        '''
+        get the inverted index from name trigrams to the positions of my locations
+        
+        Returns:
+            dict,list: the positions per trigram and the number of trigrams per position
+        '''
+        if self.nameTrigramIndex is None:
+            positionsByTrigram = {}
+            trigramCounts = []
+            for position, name in enumerate(self.getColumns()["name"]):
+                trigrams = LocationManager.getTrigrams(name) if isinstance(name, str) else set()
+                trigramCounts.append(len(trigrams))
+                for trigram in trigrams:
+                    positionsByTrigram.setdefault(trigram, []).append(position)
+            self.nameTrigramIndex = positionsByTrigram, trigramCounts
+        return self.nameTrigramIndex
+    
+    def getSimilarlyNamed(self, name:str, threshold:float=0.5) -> list:
+        '''
+        get my locations with a name similar to the given name e.g. for misspelled names
+        the candidates are collected from the trigram index so only locations sharing
+        at least one trigram with the name are compared
+        
+        Args:
+            name(str): the name to look for
+            threshold(float): the minimum Jaccard similarity of the trigram sets
+            
+        Returns:
+            list: a list of Location/similarity tuples ordered by descending similarity
+        '''
+        positionsByTrigram, trigramCounts = self.getNameTrigramIndex()
+        trigrams = LocationManager.getTrigrams(name)
+        sharedCounts = {}
+        for trigram in trigrams:
+            for position in positionsByTrigram.get(trigram, ()):
+                sharedCounts[position] = sharedCounts.get(position, 0) + 1
+        locations = self.getList()
+        similarLocations = []
+        for position, shared in sharedCounts.items():
+            similarity = shared / (len(trigrams) + trigramCounts[position] - shared)
+            if similarity >= threshold:
+                similarLocations.append((locations[position], similarity))
+        similarLocations.sort(key=lambda locationWithSimilarity:-locationWithSimilarity[1])
+        return similarLocations
+    
     def getLocationByID(self, wikidataID:str):
         '''
         Returns the location object that corresponds to the given location
@@ -145,6 +418,7 @@ class LocationManager(EntityManager):
             location(object): the location to be added and put in my hash map
         '''
         self.getList().append(location)
+        self.clearColumnCaches()
         if hasattr(location,"wikidataid"):
             self.locationByWikidataID[location.wikidataid]=location
 
@@ -177,6 +451,19 @@ class LocationManager(EntityManager):
         backupFile = Download.downloadBackupFile(url, fileName, targetDirectory, force)
         return backupFile
 
+    def getLookupDB(self):
+        '''
+        get the SQL database for lookups in my cache file - opening a connection costs more than
+        an indexed lookup so the connection is kept and reused by the current thread
+        
+        Returns:
+            SQLDB: the SQL database for the current thread
+        '''
+        sqldb=getattr(self.lookupThreadLocal,"sqldb",None)
+        if sqldb is None:
+            sqldb=self.lookupThreadLocal.sqldb=SQLDB(self.config.cacheFile,debug=self.config.debug,errorDebug=self.config.errorDebug)
+        return sqldb
+
     def getByName(self, *names:str):
         '''
         Get locations matching given names
@@ -187,7 +474,7 @@ class LocationManager(EntityManager):
             Returns locations that match the given name
         '''
         query = f"SELECT * FROM {self.clazz.__name__}Lookup WHERE label IN ({','.join('?'*len(names))})"
-        sqldb=self.getSQLDB(self.config.cacheFile)
+        sqldb=self.getLookupDB()
         locationRecords = sqldb.query(query, params=tuple(names))
         locations=self._locationsFromLookup(*locationRecords)
         return locations
@@ -205,7 +492,7 @@ class LocationManager(EntityManager):
         if wikidataIds is None or not wikidataIds:
             return
         query=f"SELECT * FROM {self.clazz.__name__}Lookup WHERE wikidataid IN ({','.join('?'*len(wikidataIds))})"
-        sqldb = self.getSQLDB(self.config.cacheFile)
+        sqldb = self.getLookupDB()
         locationRecords=sqldb.query(query, params=tuple(list(wikidataIds)))
         if locationRecords:
             locations=self._locationsFromLookup(*locationRecords)
@@ -250,7 +537,7 @@ class LocationManager(EntityManager):
             else:
                 query = f"SELECT wikidataid FROM {self.tableName} WHERE iso LIKE (?)"
                 params = (isoCode,)
-            sqldb = self.getSQLDB(self.config.cacheFile)
+            sqldb = self.getLookupDB()
             qres = sqldb.query(query, params)
             locationIds = [record['wikidataid'] for record in qres if 'wikidataid' in record]
             return locationIds
@@ -276,14 +563,17 @@ class CountryManager(LocationManager):
         self.getListOfDicts=self.wd.getCountries
 
     @classmethod
+    @functools.lru_cache(maxsize=None)
     def fromErdem(cls):
         '''
         get country list provided by Erdem Ozkol https://github.com/erdem
+        
+        the list is downloaded only once - further calls return the same CountryManager
         '''
         countryManager = CountryManager(name="countries_erdem")
         countryJsonUrl = "https://gist.githubusercontent.com/erdem/8c7d26765831d0f9a8c62f02782ae00d/raw/248037cd701af0a4957cce340dabb0fd04e38f4c/countries.json"
         with urllib.request.urlopen(countryJsonUrl) as url:
-            jsonCountryList = json.loads(url.read().decode())
+            jsonCountryList = load_json(url.read())
             for jsonCountry in jsonCountryList:
                 country = Country()
                 country.name = jsonCountry['name']
@@ -320,6 +610,9 @@ class CityManager(LocationManager):
     '''
     a list of cities
     '''
+    # the region json cache files are named by the region's ISO code
+    jsonFileIsoRegex = re.compile(r"/([^\/]*)\.json")
+    numberRegex = re.compile(r"\d+")
 
     def __init__(self, name:str="CityManager",config:StorageConfig=None,debug=False):
         super().__init__(name=name,
@@ -346,7 +639,7 @@ class CityManager(LocationManager):
         jsondir=f"{config.getCachePath()}/regions"
         if not os.path.exists(jsondir):
                 os.makedirs(jsondir)
-        jsonFiles = sorted(glob.glob(f"{jsondir}/*.json"), key=lambda path:int(re.findall(r'\d+', path)[0]))
+        jsonFiles = sorted(glob.glob(f"{jsondir}/*.json"), key=lambda path:int(CityManager.numberRegex.search(path).group(0)))
         return jsonFiles
         
     
@@ -384,13 +677,13 @@ class Location(JSONAble):
         Calculate the great circle distance between two points 
         on the earth (specified in decimal degrees)
         """
-        # convert decimal degrees to radians 
-        lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
-    
+        # convert decimal degrees to radians without building an intermediate list
+        lat1 = radians(lat1)
+        lat2 = radians(lat2)
         # haversine formula 
-        dlon = lon2 - lon1 
-        dlat = lat2 - lat1 
-        a = sin(dlat / 2) ** 2 + cos(lat1) * cos(lat2) * sin(dlon / 2) ** 2
+        sinDlat = sin((lat2 - lat1) * 0.5)
+        sinDlon = sin(radians(lon2 - lon1) * 0.5)
+        a = sinDlat * sinDlat + cos(lat1) * cos(lat2) * sinDlon * sinDlon
         c = 2 * asin(sqrt(a)) 
         return c * Earth.radius
 
@@ -406,10 +699,20 @@ class Location(JSONAble):
         Returns:
             list: a list of result Location/distance tuples
         """
-        balltree, lookupListOfLocations = lookupLocationManager.getBallTuple()
+        if lookupLocationManager.useBallTree():
+            balltree, lookupListOfLocations = lookupLocationManager.getBallTuple()
+            # check for n+1 entries since we might have my own record in the lookup list which we'll ignore later
+            k = min(n + 1, len(lookupListOfLocations))
+            distances, indices = balltree.query([[radians(self.lat), radians(self.lon)]], k=k, return_distance=True)
+            return self.balltreeQueryResultToLocationManager(distances[0], indices[0], lookupListOfLocations)
+        distances, lookupListOfLocations = lookupLocationManager.getAngularDistances(self.lat, self.lon)
         # check for n+1 entries since we might have my own record in the lookup list which we'll ignore late
-        distances, indices = balltree.query([[radians(self.lat), radians(self.lon)]], k=n + 1, return_distance=True)
-        resultLocations = self.balltreeQueryResultToLocationManager(distances[0], indices[0], lookupListOfLocations)
+        k = min(n + 1, len(distances))
+        if k < len(distances):
+            indices = np.argpartition(distances, k - 1)[:k]
+        else:
+            indices = np.arange(len(distances))
+        resultLocations = self.balltreeQueryResultToLocationManager(distances[indices], indices, lookupListOfLocations)
         return resultLocations
         
     def getLocationsWithinRadius(self, lookupLocationManager, radiusKm:float):
@@ -423,11 +726,14 @@ class Location(JSONAble):
         Returns:
             list: a list of result Location/distance tuples
         """
-        balltree, lookupListOfLocations = lookupLocationManager.getBallTuple()
-        
-        indices, distances = balltree.query_radius([[radians(self.lat), radians(self.lon)]], r=radiusKm / Earth.radius,
-                                                    return_distance=True)
-        locationList = self.balltreeQueryResultToLocationManager(distances[0], indices[0], lookupListOfLocations)
+        if lookupLocationManager.useBallTree():
+            balltree, lookupListOfLocations = lookupLocationManager.getBallTuple()
+            indices, distances = balltree.query_radius([[radians(self.lat), radians(self.lon)]], r=radiusKm / Earth.radius,
+                                                        return_distance=True)
+            return self.balltreeQueryResultToLocationManager(distances[0], indices[0], lookupListOfLocations)
+        distances, lookupListOfLocations = lookupLocationManager.getAngularDistances(self.lat, self.lon)
+        indices = np.flatnonzero(distances <= radiusKm / Earth.radius)
+        locationList = self.balltreeQueryResultToLocationManager(distances[indices], indices, lookupListOfLocations)
         return locationList
     
     def balltreeQueryResultToLocationManager(self, distances, indices, lookupListOfLocations):
@@ -486,19 +792,30 @@ class Location(JSONAble):
                 isKnown = True
         return isKnown
 
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def getSampleKeys(cls) -> frozenset:
+        '''
+        get the keys of my first sample record - computed only once per class
+        since partialDict is called for every lookup record
+        
+        Returns:
+            frozenset: the sample keys
+        '''
+        return frozenset(cls.getSamples()[0].keys())
+
     @staticmethod
     def partialDict(record, clazz, keys=None):
         if keys is None:
-            keys = clazz.getSamples()[0].keys()
-        pDict = {k: v for k, v in record.items() if k in keys}
+            keys = clazz.getSampleKeys()
+        # record might be a dict or a sqlite3.Row
+        pDict = {k: record[k] for k in record.keys() if k in keys}
         return pDict
 
     @staticmethod
     def mappedDict(record, keyMapList: list):
-        keyMap = {}
-        for mkey, mValue in keyMapList:
-            keyMap[mkey] = mValue
-        pDict = {keyMap[k]: v for k, v in record.items() if k in keyMap.keys()}
+        recordKeys = record.keys()
+        pDict = {mValue: record[mkey] for mkey, mValue in keyMapList if mkey in recordKeys}
         return pDict
 
     @classmethod
@@ -522,6 +839,10 @@ class City(Location):
     a single city as an object
     '''
 
+    # mapping of CityLookup columns to the attributes of the region and country of a city
+    regionKeyMap = [("regionId", "wikidataid"), ("regionName", "name"), ("regionIso", "iso"), ("regionPop", "pop"), ("regionLat", "lat"), ("regionLon", "lon")]
+    countryKeyMap = [("countryId", "wikidataid"), ("countryName", "name"), ("countryIso", "iso"), ("countryLat", "lat"), ("countryLon", "lon")]
+
     def __init__(self, **kwargs):
         super(City, self).__init__(**kwargs)
         if not hasattr(self, 'level'):
@@ -560,7 +881,7 @@ class City(Location):
 
         create a city from a cityLookupRecord and setting City, Region and Country while at it
         Args:
-            cityRecord(dict): a map derived from the CityLookup view
+            cityRecord(dict): a map derived from the CityLookup view - a dict or sqlite3.Row
 
         '''
         # we create city, region and country from scratch without true
@@ -571,17 +892,30 @@ class City(Location):
         cityRecord=City.partialDict(cityLookupRecord,City)
         city.fromDict(cityRecord)
 
-        regionRecord=City.mappedDict(cityLookupRecord,
-            [("regionId","wikidataid"),("regionName","name"),("regionIso","iso"),("regionPop","pop"),("regionLat","lat"),("regionLon","lon")])
+        regionRecord=City.mappedDict(cityLookupRecord,City.regionKeyMap)
         city.region=Region.fromRecord(regionRecord)
 
-        countryRecord=City.mappedDict(cityLookupRecord,
-            [("countryId","wikidataid"),("countryName","name"),("countryIso","iso"),("countryLat","lat"),("countryLon","lon")])
+        countryRecord=City.mappedDict(cityLookupRecord,City.countryKeyMap)
         city.country=Country()
         city.country.fromDict(countryRecord)
         city.region.country=city.country
         return city
     
+    @staticmethod
+    def getLookupColumns() -> list:
+        '''
+        get the names of the CityLookup columns needed by fromCityLookup
+        
+        Returns:
+            list: the column names
+        '''
+        columns = list(City.getSamples()[0].keys())
+        for keyMap in City.regionKeyMap, City.countryKeyMap:
+            for column, _attr in keyMap:
+                if column not in columns:
+                    columns.append(column)
+        return columns
+    
     def setValue(self, name, record):
         '''
         set a field value with the given name  to
@@ -591,11 +925,7 @@ class City(Location):
             name(string): the name of the field
             record(dict): the dict to get the value from
         '''
-        if name in record:
-            value = record[name]
-        else:
-            value = None
-        setattr(self, name, value)
+        setattr(self, name, record.get(name))
 
     @property
     def country(self):
@@ -907,19 +1237,36 @@ class Locator(object):
     
     # singleton instance
     locator = None
+    # populated instance kept by resetInstance for reuse by getInstance
+    reusableLocator = None
+    
+    # ISO 3166-2 code e.g. US-CA or 9 - compiled once see isISO
+    isoRegex = re.compile(r"([A-Z]{1,2}\-)?[0-9A-Z]{1,3}")
+    
+    # lookup methods that are memoized per instance (see initCache)
+    # the memoized methods do not return lists or new city objects so that callers can not change the cached values
+    cachedMethods = ["getCountry", "cityRowsForName", "similarCityRowsForName", "locateCityRow"]
+    # the minimum trigram similarity of a known city name to a misspelled name (see correctMisspelling)
+    similarNameThreshold = 0.5
 
-    def __init__(self, db_file=None, correctMisspelling=False, storageConfig:StorageConfig=None, debug=False):
+    def __init__(self, db_file=None, correctMisspelling=False, storageConfig:StorageConfig=None, debug=False, cache:bool=True, cacheSize:int=4096):
         '''
         Constructor
         
         Args:
             db_file(str): the path to the database file
-            correctMispelling(bool): if True correct typical misspellings
+            correctMispelling(bool): if True correct typical misspellings - city names that are not found
+            at all are looked up by the most similar known city names as a last resort
             storageConfig(StorageConfig): the storage Configuration to use
             debug(bool): if True show debug information
+            cache(bool): if True memoize the results of the lookup methods - not done in debug mode
+            since the debug output would only be shown for the first lookup
+            cacheSize(int): the maximum number of results to memoize per lookup method
         '''
         self.debug = debug
         self.correctMisspelling = correctMisspelling
+        self.cache = cache
+        self.cacheSize = cacheSize
         if storageConfig is None:
             storageConfig=LocationContext.getDefaultConfig()
         self.storageConfig=storageConfig
@@ -931,11 +1278,23 @@ class Locator(object):
         self.view = "CityLookup"
         self.loadDB()
         self.getAliases()
+        self.getMisspellings()
         self.dbVersion = "2021-08-18 16:15:00"
         
     @staticmethod
     def resetInstance():
-        Locator.locator = None    
+        '''
+        reset the singleton instance
+        
+        an instance with a populated database is kept for reuse by the next getInstance call
+        with the same parameters - its memoized lookups are cleared
+        '''
+        locator = Locator.locator
+        Locator.locator = None
+        Locator.reusableLocator = None
+        if locator is not None and os.path.isfile(locator.db_file) and locator.db_has_data():
+            locator.initCache()
+            Locator.reusableLocator = locator
     
     @staticmethod
     def getInstance(correctMisspelling=False, debug=False):
@@ -948,7 +1307,12 @@ class Locator(object):
             debug(bool): if True show debug information
         '''
         if Locator.locator is None:
-            Locator.locator = Locator(correctMisspelling=correctMisspelling, debug=debug)
+            reusableLocator = Locator.reusableLocator
+            Locator.reusableLocator = None
+            if reusableLocator is not None and reusableLocator.correctMisspelling == correctMisspelling and reusableLocator.debug == debug:
+                Locator.locator = reusableLocator
+            else:
+                Locator.locator = Locator(correctMisspelling=correctMisspelling, debug=debug)
         return Locator.locator
 
     def normalizePlaces(self,places:list):
@@ -982,21 +1346,96 @@ class Locator(object):
         '''
         # make sure the database is populated
         self.populate_db()
+        places=self.normalizePlaces(places)
+        foundCity = self.locateNormalizedPlaces(*places)
+        return foundCity
+    
+    def locateNormalizedPlaces(self, *places:str):
+        '''
+        locate a city, region country combination based on the given normalized places
+        
+        Args:
+            *places(str): the stripped and aliased places e.g. "San Francisco", "CA"
+        
+        Returns:
+            City: a new city object with country and region details
+        '''
+        # the normalized places are passed as arguments so that the found row can be memoized
+        cityRow = self.locateCityRow(*places)
+        foundCity = None if cityRow is None else City.fromCityLookup(cityRow)
+        return foundCity
+    
+    def locateCityRow(self, *places:str):
+        '''
+        get the city lookup record of the city, region country combination based on the given normalized places
+        
+        Args:
+            *places(str): the stripped and aliased places e.g. "San Francisco", "CA"
+        
+        Returns:
+            sqlite3.Row: the city lookup record of the city found or None
+        '''
+        cityRow, _foundCity = self.findCity(places, self.cityRowsForName)
+        return cityRow
+    
+    def findCity(self, places, getCityRows):
+        '''
+        find the city, region country combination for the given normalized places
+        from the city candidates of each place
+        
+        Args:
+            places(list): the stripped and aliased places e.g. "San Francisco", "CA"
+            getCityRows(function): the function to get the city lookup records for a place name
+            
+        Returns:
+            tuple: the city lookup record and the City found or None, None
+        '''
         country = None
-        cities = []
+        cityRows = []
         regions = []
         # loop over all word elements
-        places=self.normalizePlaces(places)
         for place in places:
             foundCountry = self.getCountry(place)
             if foundCountry is not None:
                 country = foundCountry
-            foundCities = self.cities_for_name(place)
-            cities.extend(foundCities)
+            cityRows.extend(getCityRows(place))
             foundRegions = self.regions_for_name(place)
             regions.extend(foundRegions)
+        if not cityRows and self.correctMisspelling:
+            # last resort - the places that are neither a country nor a region might be misspelled city names
+            for place in places:
+                if self.getCountry(place) is None and not self.regions_for_name(place):
+                    cityRows.extend(self.similarCityRowsForName(place))
+        cities = [City.fromCityLookup(cityRow) for cityRow in cityRows]
         foundCity = self.disambiguate(country, regions, cities)
-        return foundCity
+        if foundCity is None:
+            return None, None
+        cityRow = next(cityRow for cityRow, city in zip(cityRows, cities) if city is foundCity)
+        return cityRow, foundCity
+    
+    def locateCities(self, placesList:list, chunkSize:int=500):
+        '''
+        locate the cities for a batch of place lists - the city candidates for all
+        place names of the batch are looked up with a single query per chunk of names
+        
+        Args:
+            placesList(list): a list of place lists as accepted by locateCity
+            chunkSize(int): the maximum number of place names per query
+            
+        Returns:
+            list: the City (or None) found for each place list
+        '''
+        # make sure the database is populated
+        self.populate_db()
+        placesList = [self.normalizePlaces(places) for places in placesList]
+        placeNames = {place for places in placesList for place in places}
+        cityRowsByName = self.cityRowsByNames(placeNames, chunkSize=chunkSize)
+        getCityRows = lambda place: cityRowsByName.get(place, ())
+        foundCities = []
+        for places in placesList:
+            _cityRow, foundCity = self.findCity(places, getCityRows)
+            foundCities.append(foundCity)
+        return foundCities
 
     @staticmethod
     def isISO(s):
@@ -1007,8 +1446,8 @@ class Locator(object):
         Returns:
             bool: True if the string might be an ISO Code as per a regexp check
         '''
-        m = re.search(r"^([A-Z]{1,2}\-)?[0-9A-Z]{1,3}$", s)
-        result = m is not None
+        # the length check fails fast for the typical non ISO token
+        result = len(s) <= 6 and Locator.isoRegex.fullmatch(s) is not None
         return result
                
     def disambiguate(self, country, regions, cities, byPopulation=True): 
@@ -1027,32 +1466,24 @@ class Locator(object):
             print("countries: %s " % country)
             print("regions: %s" % "\n\t".join(str(r) for r in regions))
             print("cities: %s" % "\n\t".join(str(c) for c in cities))
-        foundCity = None
+        if not cities:
+            return None
         # is the city information unique?
         if len(cities) == 1:
-            foundCity = cities[0]
-        else: 
-            if len(cities) > 1:
-                if country is not None:
-                    for city in cities:
-                        if self.debug:
-                            print("city %s: " % (city))
-                        if city.country.iso == country.iso:
-                            foundCity = city
-                            break
-                if foundCity is None and len(regions) > 0:
-                    for region in regions:
-                        for city in cities:
-                            if city.region.iso == region.iso and not city.region.name == city.name:
-                                foundCity = city
-                                break
-                        if foundCity is not None:
-                            break
-                if foundCity is None and byPopulation:
-                    foundCity = max(cities, key=lambda city:0 if city.pop is None else city.pop)
-                    pass
-                    
-        return foundCity    
+            return cities[0]
+        if country is not None:
+            countryIso = country.iso
+            foundCity = next((city for city in cities if city.country.iso == countryIso), None)
+            if foundCity is not None:
+                return foundCity
+        if regions:
+            regionIsos = {region.iso for region in regions}
+            foundCity = next((city for city in cities if city.region.iso in regionIsos and city.region.name != city.name), None)
+            if foundCity is not None:
+                return foundCity
+        if byPopulation:
+            return max(cities, key=lambda city:0 if city.pop is None else city.pop)
+        return None
     
     def cities_for_name(self, cityName):
         '''
@@ -1062,13 +1493,90 @@ class Locator(object):
             cityName(string): the potential name of a city
         
         Returns:
-            a list of city records
+            a list of new city objects
         '''
-        cities = []
-        cityRecords = self.places_by_name(cityName, "name")
-        for cityRecord in cityRecords:
-            cities.append(City.fromCityLookup(cityRecord))
+        cities = [City.fromCityLookup(cityRow) for cityRow in self.cityRowsForName(cityName)]
         return cities
+    
+    def cityRowsForName(self, cityName) -> tuple:
+        '''
+        get the city lookup records of the cities with the given cityName
+        
+        Args:
+            cityName(string): the potential name of a city
+        
+        Returns:
+            tuple: the sqlite3.Row records sorted by population
+        '''
+        cityRows = self.cityRowsByNames([cityName]).get(cityName, ())
+        return tuple(cityRows)
+    
+    def similarCityRowsForName(self, cityName) -> tuple:
+        '''
+        get the city lookup records of the cities with the known names most similar to the given
+        possibly misspelled cityName
+        
+        Args:
+            cityName(string): the potential misspelled name of a city
+        
+        Returns:
+            tuple: the sqlite3.Row records sorted by population
+        '''
+        similarCities = self.getCityNameManager().getSimilarlyNamed(cityName, threshold=self.similarNameThreshold)
+        if not similarCities:
+            return ()
+        bestSimilarity = similarCities[0][1]
+        similarNames = [city.name for city, similarity in similarCities if similarity == bestSimilarity]
+        cityRowsByName = self.places_by_names(similarNames, "name")
+        cityRows = [cityRow for similarName in similarNames for cityRow in cityRowsByName.get(similarName, ())]
+        self.sortByPopulation(cityRows)
+        return tuple(cityRows)
+    
+    def getCityNameManager(self):
+        '''
+        get the in memory manager of the distinct city names with the name trigram index for the
+        misspelled name lookups - it is only loaded on first use
+        
+        Returns:
+            CityManager: a CityManager with a City per distinct name
+        '''
+        if self.cityNameManager is None:
+            self.populate_db()
+            cityNameManager = CityManager(config=StorageConfig.getJSON())
+            nameRows = self.sqlDB.c.execute("SELECT DISTINCT name FROM cities WHERE name IS NOT NULL")
+            cityNameManager.getList().extend(City(name=name) for (name,) in nameRows)
+            cityNameManager.clearColumnCaches()
+            self.cityNameManager = cityNameManager
+        return self.cityNameManager
+    
+    def cityRowsByNames(self, cityNames, chunkSize:int=500) -> dict:
+        '''
+        get the city lookup records for the given names - names without an exact match
+        are retried case and accent insensitive
+        
+        Args:
+            cityNames(iterable): the potential names of cities
+            chunkSize(int): the maximum number of names per query
+            
+        Returns:
+            dict: the sqlite3.Row records sorted by population for each name found
+        '''
+        self.populate_db()
+        cityNames = list(cityNames)
+        cityRowsByName = self.places_by_names(cityNames, "name", chunkSize=chunkSize)
+        if "normalizedname" in self.getViewColumns():
+            # names without latin letters fold to an empty string which must not be looked up
+            cityNamesByNormalizedName = {}
+            for cityName in cityNames:
+                if cityName not in cityRowsByName:
+                    normalizedName = normalize_name(cityName)
+                    if normalizedName:
+                        cityNamesByNormalizedName.setdefault(normalizedName, []).append(cityName)
+            cityRowsByNormalizedName = self.places_by_names(cityNamesByNormalizedName, "normalizedName", chunkSize=chunkSize)
+            for normalizedName, cityRows in cityRowsByNormalizedName.items():
+                for cityName in cityNamesByNormalizedName[normalizedName]:
+                    cityRowsByName[cityName] = cityRows
+        return cityRowsByName
 
     def regions_for_name(self, region_name):
         '''
@@ -1080,17 +1588,30 @@ class Locator(object):
         Returns:
             list: the list of cities for this region
         '''
-        regions = []    
         if self.isISO(region_name):
             columnName = "iso"
         else:
             columnName = 'name'
-        query = f"SELECT * from regions WHERE {columnName} = (?)" 
-        params = (region_name,)
-        regionRecords = self.sqlDB.query(query, params)
-        for regionRecord in regionRecords:
-            regions.append(Region.fromRecord(regionRecord))
-        return regions                     
+        regionLookup = self.getRegionLookups()[columnName]
+        regions = list(regionLookup.get(region_name, []))
+        return regions
+    
+    def getRegionLookups(self):
+        '''
+        get the in memory lookups of all regions by name and by iso code
+        the regions table is small so it is loaded only once on first use
+        
+        Returns:
+            dict: the list of regions per name and per iso code keyed by the column name
+        '''
+        if self.regionLookups is None:
+            regionLookups = {"name": {}, "iso": {}}
+            for regionRecord in self.sqlDB.query("SELECT * FROM regions"):
+                region = Region.fromRecord(regionRecord)
+                for columnName, regionLookup in regionLookups.items():
+                    regionLookup.setdefault(regionRecord.get(columnName), []).append(region)
+            self.regionLookups = regionLookups
+        return self.regionLookups
     
     def correct_country_misspelling(self, name):
         '''
@@ -1100,13 +1621,7 @@ class Locator(object):
         Return:
             string: correct name of unchanged
         '''
-        cur_dir = os.path.dirname(os.path.realpath(__file__))
-        with open(cur_dir + "/data/ISO3166ErrorDictionary.csv") as info:
-            reader = csv.reader(info)
-            for row in reader:
-                if name == remove_non_ascii(row[0]):
-                    return row[2]
-        return name
+        return self.misspellings.get(name, name)
 
     def is_a_country(self, name):
         '''
@@ -1129,23 +1644,46 @@ class Locator(object):
         Returns:     
             country: the country if one was found or None if not
         '''
+        countryLookups = self.getCountryLookups()
         if self.isISO(name):
-            query="SELECT * FROM countries WHERE iso = (?)"""
-            params=(name,)
+            countries = countryLookups["iso"].get(name, {})
         else:
             if self.correctMisspelling:
                 name = self.correct_country_misspelling(name)
-            query="""SELECT * FROM countries 
-WHERE name LIKE (?)
-OR wikidataid in (SELECT wikidataid FROM country_labels WHERE label LIKE (?))"""
-            params=(name,name,)
+            countries = countryLookups["name"].get(name.lower(), {})
         country = None
-        countryRecords=self.sqlDB.query(query,params)
-        if len(countryRecords)==1:
-            country=Country.fromRecord(countryRecords[0])
-            pass
+        if len(countries)==1:
+            country=next(iter(countries.values()))
         return country
     
+    def getCountryLookups(self):
+        '''
+        get the in memory lookups of all countries by iso code and by lowercase name or label
+        the lookups are keyed by wikidataid so that a country matching both by name and by label
+        is only counted once
+        
+        Returns:
+            dict: the countries per iso code and per lowercase name or label keyed by the column name
+        '''
+        if self.countryLookups is None:
+            countryLookups = {"iso": {}, "name": {}}
+            countriesById = {}
+            for countryRecord in self.sqlDB.query("SELECT * FROM countries"):
+                country = Country.fromRecord(countryRecord)
+                wikidataid = countryRecord.get("wikidataid")
+                countriesById[wikidataid] = country
+                countryLookups["iso"].setdefault(countryRecord.get("iso"), {})[wikidataid] = country
+                name = countryRecord.get("name")
+                if name is not None:
+                    countryLookups["name"].setdefault(name.lower(), {})[wikidataid] = country
+            for labelRecord in self.sqlDB.query("SELECT label,wikidataid FROM country_labels"):
+                wikidataid = labelRecord.get("wikidataid")
+                label = labelRecord.get("label")
+                if label is not None and wikidataid in countriesById:
+                    countryLookups["name"].setdefault(label.lower(), {})[wikidataid] = countriesById[wikidataid]
+            self.countryLookups = countryLookups
+        return self.countryLookups
+    
     def getView(self):
         '''
         get the view to be used
@@ -1163,15 +1701,120 @@ OR wikidataid in (SELECT wikidataid FROM country_labels WHERE label LIKE (?))"""
             placeName(string): the name of the place
             columnName(string): the column to look at
         '''
-        if not self.db_has_data():
-            self.populate_db()
-        view = self.getView()
-        query = f'SELECT * FROM {view} WHERE {columnName} = (?) ORDER BY pop DESC'
-        params = (placeName,)
-        cityLookupRecords = self.sqlDB.query(query, params)
-        cityLookupRecords.sort(key=lambda cityRecord: float(cityRecord.get('pop')) if cityRecord.get('pop') is not None else 0.0,reverse=True)
+        cityLookupRecords = [dict(cityRow) for cityRow in self.placeRowsByName(placeName, columnName)]
         return cityLookupRecords
     
+    def placeRowsByName(self, placeName, columnName):
+        '''
+        get places by name and column as sqlite3.Row records sorted by population
+        without the conversion to dicts
+        
+        Args:
+            placeName(string): the name of the place
+            columnName(string): the column to look at
+            
+        Returns:
+            list: the sqlite3.Row records found
+        '''
+        self.populate_db()
+        query = self.getPlaceQuery(columnName)
+        cityRows = self.rawQuery(query, (placeName,))
+        self.sortByPopulation(cityRows)
+        return cityRows
+    
+    def rawQuery(self, query, params=()):
+        '''
+        run the given query and return the sqlite3.Row results
+        which allow access by column name without creating a dict per row
+        
+        Args:
+            query(str): the SQL query to execute
+            params(tuple): the query params, if any
+            
+        Returns:
+            list: a list of sqlite3.Row records
+        '''
+        cursor = self.sqlDB.c.cursor()
+        cursor.row_factory = sqlite3.Row
+        rows = cursor.execute(query, params).fetchall()
+        cursor.close()
+        return rows
+    
+    def places_by_names(self, placeNames, columnName, chunkSize:int=500):
+        '''
+        get places for multiple names of the given column with one query per chunk of names
+        
+        Args:
+            placeNames(iterable): the names of the places
+            columnName(string): the column to look at
+            chunkSize(int): the maximum number of names per query
+            
+        Returns:
+            dict: the list of city lookup sqlite3.Row records for each name found
+        '''
+        placeNames = list(placeNames)
+        cityRowsByName = {}
+        for offset in range(0, len(placeNames), chunkSize):
+            params = placeNames[offset:offset + chunkSize]
+            query = self.getPlaceQuery(columnName, len(params))
+            for cityRow in self.rawQuery(query, params):
+                cityRowsByName.setdefault(cityRow[columnName], []).append(cityRow)
+        for cityRows in cityRowsByName.values():
+            self.sortByPopulation(cityRows)
+        return cityRowsByName
+    
+    @staticmethod
+    def sortByPopulation(cityLookupRecords:list):
+        '''
+        sort the given city lookup records by population in descending order
+        
+        Args:
+            cityLookupRecords(list): the dict or sqlite3.Row records to sort in place
+        '''
+        cityLookupRecords.sort(key=lambda cityRecord: float(cityRecord['pop']) if cityRecord['pop'] is not None else 0.0,reverse=True)
+    
+    def getPlaceQuery(self, columnName, paramCount:int=1):
+        '''
+        get the prepared query to lookup places by the given column of my view
+        the query only selects the columns needed by City.fromCityLookup
+        
+        Args:
+            columnName(string): the column to look at
+            paramCount(int): the number of values to look for
+            
+        Returns:
+            str: the query string
+        '''
+        key = (columnName, paramCount)
+        if key not in self.placeQueries:
+            view = self.getView()
+            viewColumns = self.getViewColumns()
+            columns = [column for column in City.getLookupColumns() if column.lower() in viewColumns]
+            if columnName not in columns:
+                # the lookup column is needed to assign the rows of a multi name query to the names
+                columns.append(columnName)
+            if paramCount == 1:
+                condition = f"{columnName} = (?)"
+            else:
+                condition = f"{columnName} IN ({','.join('?' * paramCount)})"
+            # alias the columns to get the expected case of the column names e.g. countryLat instead of CountryLat
+            selectList = ",".join(f"{column} AS {column}" for column in columns)
+            query = f"SELECT {selectList} FROM {view} WHERE {condition} ORDER BY pop DESC"
+            self.placeQueries[key] = query
+        return self.placeQueries[key]
+    
+    def getViewColumns(self) -> list:
+        '''
+        get the lowercase column names of my view
+        
+        Returns:
+            list: the column names
+        '''
+        if self.viewColumns is None:
+            cursor = self.sqlDB.c.execute(f"SELECT * FROM {self.getView()} LIMIT 0")
+            self.viewColumns = [description[0].lower() for description in cursor.description]
+        return self.viewColumns
+    
      
     def recreateDatabase(self):
         '''
@@ -1188,18 +1831,32 @@ OR wikidataid in (SELECT wikidataid FROM country_labels WHERE label LIKE (?))"""
         Args:
             force(bool): if True force a recreation of the database
         '''
+        # the check for data is only needed once per database
+        if self.dbInitialized and not force:
+            return
         hasData = self.db_has_data()
         if force:
             self.populate_Countries(self.sqlDB)
             self.populate_Regions(self.sqlDB)
             self.populate_Cities(self.sqlDB)
+            # the views and indices are created after all data has been inserted
             self.createViews(self.sqlDB)
             self.populate_Version(self.sqlDB)
+            self.initCache()
     
         elif not hasData:
             self.downloadDB()
+        else:
+            try:
+                # add the lookup indices to databases downloaded before they were introduced
+                self.createIndices(self.sqlDB)
+            except sqlite3.OperationalError as ex:
+                # e.g. a read only or locked database - the lookups work without the indices, only slower
+                if self.debug:
+                    print(f"could not create the lookup indices: {ex}")
         if not os.path.isfile(self.db_file):
             raise(f"could not create lookup database {self.db_file}")
+        self.dbInitialized = True
         
     def downloadDB(self, forceUpdate:bool=False):
         '''
@@ -1213,6 +1870,7 @@ OR wikidataid in (SELECT wikidataid FROM country_labels WHERE label LIKE (?))"""
                                                          targetDirectory=self.storageConfig.getCachePath(),
                                                          force=forceUpdate)
             self.loadDB()
+            self.createIndices(self.sqlDB)
         
             
     def populate_Version(self, sqlDB):
@@ -1251,6 +1909,16 @@ OR wikidataid in (SELECT wikidataid FROM country_labels WHERE label LIKE (?))"""
         self.aliases = {}
         for alias in aliases:
             self.aliases[alias['name']] = alias['alias']
+            
+    def getMisspellings(self):
+        '''
+        get the hashTable of typical country misspellings and their correction
+        '''
+        misspellings = self.readCSV("ISO3166ErrorDictionary.csv")
+        self.misspellings = {}
+        for misspelling in misspellings:
+            # the first entry for a misspelling wins
+            self.misspellings.setdefault(remove_non_ascii(misspelling['data.un.org entry']), misspelling['ISO3166 name or code'])
         
            
     def populate_Countries(self, sqlDB):
@@ -1296,22 +1964,28 @@ OR wikidataid in (SELECT wikidataid FROM country_labels WHERE label LIKE (?))"""
         cityManager=CityManager(config=config)
         cityManager.getList().clear()
         for jsonFileName in jsonFiles:
-            isoMatch = re.search(r"/([^\/]*)\.json", jsonFileName)
+            isoMatch = CityManager.jsonFileIsoRegex.search(jsonFileName)
             if not isoMatch:
                 print(f"{jsonFileName} - does not match a known region's ISO code")
             else:
                 rIso=isoMatch.group(1)
                 region=regionByIso[rIso]
-                with open(jsonFileName) as jsonFile:
-                    cities4Region = json.load(jsonFile)
+                # read bytes so that utf-8 encoded cache files load independent of the locale
+                with open(jsonFileName,"rb") as jsonFile:
+                    cities4Region = load_json(jsonFile.read())
                     for city4Region in cities4Region:
                         city=City()
                         city.fromDict(city4Region)
                         if hasattr(city, "regionId"):
                             city.partOfRegionId=city.regionId
                         city.regionId=region.wikidataid
+                        if getattr(city, "name", None) is not None:
+                            # names without latin letters fold to an empty string - store NULL for them
+                            city.normalizedName=normalize_name(city.name) or None
                         cityManager.add(city)
                         pass
+        # insert all cities with a single executemany call and commit
+        cityManager.executeMany=True
         cityManager.store()
         profiler.time()
         
@@ -1357,6 +2031,32 @@ JOIN countries c on cl.wikidataid=c.wikidataid
 "CREATE INDEX regionByCountry ON regions (countryId)"]
         for viewDDL in viewDDLs:
             sqlDB.execute(viewDDL)
+        self.createIndices(sqlDB)
+            
+    def createIndices(self, sqlDB):
+        '''
+        create the indices for the columns used by the name and iso code lookups
+        if they do not exist yet - a database that has all of them is only read
+        
+        Args:
+            sqlDB(SQLDB): target SQL database
+        '''
+        indices = [("cityByName", "cities", "name"),
+            ("cityLabelByLabel", "city_labels", "label"),
+            ("regionByWikidataid", "regions", "wikidataid"),
+            ("regionByName", "regions", "name"),
+            ("regionByIso", "regions", "iso"),
+            ("regionLabelByLabel", "region_labels", "label"),
+            ("countryByWikidataid", "countries", "wikidataid"),
+            ("countryByIso", "countries", "iso"),
+            ("countryLabelByLabel", "country_labels", "label")]
+        cityColumns = [column[1] for column in sqlDB.c.execute("PRAGMA table_info(cities)")]
+        if "normalizedName" in cityColumns:
+            indices.append(("cityByNormalizedName", "cities", "normalizedName"))
+        existingIndices = {row[0] for row in sqlDB.c.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+        for indexName, tableName, columnName in indices:
+            if indexName not in existingIndices:
+                sqlDB.execute(f"CREATE INDEX IF NOT EXISTS {indexName} ON {tableName} ({columnName})")
     
     def db_recordCount(self, tableList, tableName):
         '''
@@ -1407,6 +2107,29 @@ JOIN countries c on cl.wikidataid=c.wikidataid
         loads the database from cache and sets it as sqlDB property
         '''
         self.sqlDB = SQLDB(self.db_file, errorDebug=True)
+        self.dbInitialized = False
+        # the lookup database is read mostly - avoid syncs and use memory mapped io
+        for pragma in ["PRAGMA synchronous=NORMAL", "PRAGMA temp_store=MEMORY", "PRAGMA mmap_size=268435456"]:
+            self.sqlDB.execute(pragma)
+        self.initCache()
+        
+    def initCache(self):
+        '''
+        (re)initialize the memoization of my cachedMethods - the lru_cache is
+        bound to this instance so that self is not part of the cache key
+        
+        the prepared place queries and in memory lookups are reset as well since they depend on the database
+        '''
+        self.placeQueries = {}
+        self.viewColumns = None
+        self.regionLookups = None
+        self.countryLookups = None
+        self.cityNameManager = None
+        for methodName in self.cachedMethods:
+            method = getattr(type(self), methodName).__get__(self)
+            if self.cache and not self.debug:
+                method = functools.lru_cache(maxsize=self.cacheSize)(method)
+            setattr(self, methodName, method)
 
     
 __version__ = '0.2.2'
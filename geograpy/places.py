@@ -12,6 +12,8 @@ class PlaceContext(Locator):
     '''
     Adds context information to a place name
     '''
+    # lookup methods that are memoized per instance (see Locator.initCache)
+    cachedMethods = Locator.cachedMethods + ["regionNamesOfCountry"]
 
     def __init__(self, place_names:list, setAll:bool=True,correctMisspelling:bool=False):
         '''
@@ -60,6 +62,15 @@ WHERE c.name=(?)"""
         '''
         get region names for the given country
         
+        Args:
+            countryName(str): the name of the country
+        '''
+        return list(self.regionNamesOfCountry(countryName))
+    
+    def regionNamesOfCountry(self, countryName:str)->tuple:
+        '''
+        get the region names for the given country as an immutable tuple that may be memoized
+        
         Args:
             countryName(str): the name of the country
         '''
@@ -78,7 +89,7 @@ WHERE c.name=(?)"""
             )
         )"""
         regionRecords=self.sqlDB.query(regionOfCountryQuery, params=(countryName,countryName,))
-        return [r.get('name') for r in regionRecords]
+        return tuple(r.get('name') for r in regionRecords)
 
     def setAll(self):
         '''
@@ -163,8 +174,7 @@ WHERE c.name=(?)"""
         if not self.regions:
             self.set_regions()
 
-        if not self.db_has_data():
-            self.populate_db()
+        self.populate_db()
         # ToDo: Duplicate with Locator.city_for_name e.g. extend method to support multiple names
         placesWithoutDuplicates=set(self.places)
         params=",".join("?" * len(placesWithoutDuplicates))
@@ -4,6 +4,13 @@ import jellyfish
 import time
 import urllib.request
 import os
+import unicodedata
+import json
+try:
+    # optional faster JSON parser
+    import orjson
+except ImportError:
+    orjson = None
 
 class Download:
     '''
@@ -116,6 +123,47 @@ def remove_non_ascii(s):
     return "".join(i for i in s if ord(i) < 128)
 
 
+def normalize_name(s):
+    ''' 
+    Normalize the given name for case and accent insensitive lookups
+    by folding it to lowercase ascii e.g. Zürich -> zurich
+    Args:
+        s: 
+            string: The name to normalize 
+    Returns:
+        string: The lowercase ascii folded name 
+    '''
+    return unicodedata.normalize('NFKD', s).encode('ascii', 'ignore').decode('ascii').lower()
+
+
+def load_json(jsonBytes):
+    ''' 
+    Parse the given JSON content using orjson if it is installed and the json module otherwise
+    Args:
+        jsonBytes: 
+            bytes or string: The JSON content to parse 
+    Returns:
+        object: The parsed JSON content 
+    '''
+    if orjson is not None:
+        return orjson.loads(jsonBytes)
+    return json.loads(jsonBytes)
+
+
+def dump_json(records)->bytes:
+    ''' 
+    Serialize the given records to utf-8 encoded JSON using orjson if it is installed and the json module otherwise
+    Args:
+        records: 
+            object: The content to serialize 
+    Returns:
+        bytes: The utf-8 encoded JSON content 
+    '''
+    if orjson is not None:
+        return orjson.dumps(records)
+    return json.dumps(records).encode("utf-8")
+
+
 def fuzzy_match(s1, s2, max_dist=.8):
     ''' 
     Fuzzy match the given two strings with the given maximum distance
@@ -4,13 +4,23 @@ Created on 2020-09-23
 @author: wf
 '''
 import re
+import random
+import socket
+import time
+import urllib.error
 from geograpy.utils import Profiler
 from lodstorage.sparql import SPARQL
+from SPARQLWrapper.SPARQLExceptions import EndPointInternalError
 
 class Wikidata(object):
     '''
     Wikidata access
     '''
+    # https://stackoverflow.com/a/18237992/1497139
+    floatRegex=r"[-+]?\d+([.,]\d*)?"
+    coordinateRegex=re.compile(fr"Point\((?P<lon>{floatRegex})\s+(?P<lat>{floatRegex})\)")
+    # regex pattern taken from https://www.wikidata.org/wiki/Q43649390 and extended to also support property ids
+    wikidataidRegex=re.compile(r"[PQ][1-9]\d*")
 
     def __init__(self, endpoint='https://query.wikidata.org/sparql',profile:bool=True):
         '''
@@ -19,23 +29,34 @@ class Wikidata(object):
         self.endpoint=endpoint
         self.profile=profile
         
-    def query(self,msg,queryString:str,limit=None)->list:
+    def query(self,msg,queryString:str,limit=None,retries:int=1,backoff:float=2.0)->list:
         '''
         get the query result
         
         Args:
             msg(str): the profile message to display
             queryString(str): the query to execute
+            retries(int): the maximum number of attempts e.g. when parallel queries are throttled - at least 1
+            backoff(float): the base delay in seconds before retrying - doubled and jittered per attempt
             
         Return:
             list: the list of dicts with the result
         '''
+        if retries<1:
+            raise ValueError(f"retries must be at least 1 but is {retries}")
         profile=Profiler(msg,profile=self.profile)
         wd=SPARQL(self.endpoint)
         limitedQuery=queryString
         if limit is not None:
             limitedQuery=f"{queryString} LIMIT {limit}"
-        results=wd.query(limitedQuery)
+        for attempt in range(retries):
+            try:
+                results=wd.query(limitedQuery)
+                break
+            except Exception as ex:
+                if attempt+1>=retries or not Wikidata.isTransientError(ex):
+                    raise
+                time.sleep(backoff*2**attempt+random.uniform(0,backoff))
         lod=wd.asListOfDicts(results)
         for record in lod:
             for key in list(record.keys()):
@@ -53,6 +74,25 @@ class Wikidata(object):
         profile.time(f"({len(lod)})")
         return lod
     
+    @staticmethod
+    def isTransientError(ex:Exception)->bool:
+        '''
+        check whether the given query exception might go away when retrying
+        
+        Args:
+            ex(Exception): the exception raised by the query
+            
+        Returns:
+            bool: True for throttling (HTTP 429), server errors (HTTP 5xx) and timeouts
+        '''
+        if isinstance(ex,EndPointInternalError):
+            return True
+        if isinstance(ex,urllib.error.HTTPError):
+            return ex.code==429 or ex.code>=500
+        if isinstance(ex,urllib.error.URLError):
+            ex=ex.reason
+        return isinstance(ex,(socket.timeout,TimeoutError))
+    
     def store2DB(self,lod,tableName:str,primaryKey:str=None,sqlDB=None):
         '''
         store the given list of dicts to the database
@@ -66,7 +106,8 @@ class Wikidata(object):
         msg=f"Storing {tableName}"
         profile=Profiler(msg,profile=self.profile)
         entityInfo = sqlDB.createTable(lod, entityName=tableName, primaryKey=primaryKey, withDrop=True,sampleRecordCount=-1)
-        sqlDB.store(lod, entityInfo, fixNone=True)
+        # insert all records with a single executemany call and commit
+        sqlDB.store(lod, entityInfo, executeMany=True, fixNone=True)
         profile.time()
         
     def getCountries(self,limit=None):
@@ -237,9 +278,17 @@ WHERE {
         citiesList=self.query(msg, queryString,limit=limit)
         return citiesList
     
-    def getCitiesForRegion(self,regionId,msg):
+    def getCitiesForRegion(self,regionId,msg,retries:int=1):
         '''
         get the cities for the given Region
+        
+        the regions are deliberately queried one at a time: the query for a single large region
+        already comes close to the timeout and the result does not tell which of several regions a city was found for
+        
+        Args:
+            regionId(str): the wikidata id of the region
+            msg(str): the profile message to display
+            retries(int): the maximum number of attempts
         '''
         regionPath="?region ^wdt:P131/^wdt:P131/^wdt:P131 ?cityQ." if regionId in ["Q980","Q21"] else "?cityQ wdt:P131* ?region." 
         queryString="""# get cities by region for geograpy3
@@ -293,7 +342,7 @@ SELECT distinct (?cityQ as ?wikidataid) ?name ?geoNameId ?gndId ?regionId ?count
       ?cityQ wdt:P17 ?countryId .
   }
 }""" % (regionId,regionPath)           
-        regionCities=self.query(msg, queryString)
+        regionCities=self.query(msg, queryString, retries=retries)
         return regionCities
 
     def getCityStates(self, limit=None):
@@ -350,13 +399,10 @@ WHERE
         Returns:
             Returns the longitude and latitude of the given coordinate as separate values
         '''
-        # https://stackoverflow.com/a/18237992/1497139
-        floatRegex=r"[-+]?\d+([.,]\d*)?"
-        regexp=fr"Point\((?P<lon>{floatRegex})\s+(?P<lat>{floatRegex})\)"
         cMatch=None
         if coordinate:
             try:
-                cMatch = re.search(regexp, coordinate)
+                cMatch = Wikidata.coordinateRegex.search(coordinate)
             except Exception as ex:
                 # ignore
                 pass
@@ -383,8 +429,7 @@ WHERE
             The wikidata id if present in the given wikidata URL otherwise None
         '''
 
-        # regex pattern taken from https://www.wikidata.org/wiki/Q43649390 and extended to also support property ids
-        wikidataidMatch = re.search(r"[PQ][1-9]\d*", wikidataURL)
+        wikidataidMatch = Wikidata.wikidataidRegex.search(wikidataURL)
         if wikidataidMatch and wikidataidMatch.group(0):
             wikidataid = wikidataidMatch.group(0)
             return wikidataid
@@ -403,17 +448,10 @@ WHERE
         Returns:
             str
         '''
-        clauseValues=""
-        if isinstance(values, list):
-            for value in values:
-                if wikidataEntities:
-                    clauseValues+=f"wd:{value} "
-                else:
-                    clauseValues+=f"{value} "
-        else:
-            if wikidataEntities:
-                clauseValues = f"wd:{values} "
-            else:
-                clauseValues = f"{values} "
+        if not isinstance(values, list):
+            values=[values]
+        prefix="wd:" if wikidataEntities else ""
+        # join once instead of growing the string per value
+        clauseValues="".join([f"{prefix}{value} " for value in values])
         clause = "VALUES ?%s { %s }" %(varName, clauseValues)
         return clause
\ No newline at end of file
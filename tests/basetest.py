@@ -15,15 +15,20 @@ class Geograpy3Test(TestCase):
     base test for geograpy 3 tests
     '''
 
-    def setUp(self,debug=False):
+    def setUp(self,debug=False,resetLocator=True):
         '''
         setUp test environment
+        
+        Args:
+            debug(bool): if True show debug information
+            resetLocator(bool): if True start with a fresh Locator instance otherwise reuse the existing one
         '''
         TestCase.setUp(self)
         self.debug=debug
         msg=f"test {self._testMethodName}, debug={self.debug}"
         self.profile=Profiler(msg)
-        Locator.resetInstance()
+        if resetLocator:
+            Locator.resetInstance()
         locator=Locator.getInstance()
         locator.downloadDB()
         # actively test Wikidata tests?
@@ -7,11 +7,11 @@ import unittest
 from tests.basetest import Geograpy3Test
 from geograpy.locator import City,CityManager,CountryManager,RegionManager,LocationContext
 from geograpy.wikidata import Wikidata
-from geograpy.utils import Profiler
-import json
+from geograpy.utils import Profiler, load_json, dump_json
 import os
 import re
 import getpass
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 class TestCachingCitiesByRegion(Geograpy3Test):
     '''
@@ -26,7 +26,15 @@ class TestCachingCitiesByRegion(Geograpy3Test):
     
     '''
 
-    def cacheRegionCities2Json(self,limit,showDone=False):
+    def cacheRegionCities2Json(self,limit,showDone=False,maxWorkers:int=4):
+        '''
+        cache the cities of the first limit regions as JSON files - one file per region
+        
+        Args:
+            limit(int): the maximum number of regions to handle
+            showDone(bool): if True show the regions that are already cached
+            maxWorkers(int): the number of parallel queries - keep this low to respect the Wikidata query service limits
+        '''
         # TODO - refactor to Locator/LocationContext - make available via command line
         wd=Wikidata()
         config=LocationContext.getDefaultConfig()
@@ -39,24 +47,45 @@ class TestCachingCitiesByRegion(Geograpy3Test):
         cachePath=f"{config.getCachePath()}/regions"
         if not os.path.exists(cachePath):
                 os.makedirs(cachePath)
-        for index,region in enumerate(regionList):
-            if index>=limit:
-                break
-            regionId=region.wikidataid
-            msg=f"{index+1:4d}/{total:4d}:getting cities for {region.name} {region.iso} {region.wikidataid}"
-            jsonFileName=f"{cachePath}/{region.iso}.json"
-            if os.path.isfile(jsonFileName):
-                if showDone:
-                    print(msg)
-            else:
+        with ThreadPoolExecutor(max_workers=maxWorkers) as executor:
+            futures=[]
+            for index,region in enumerate(regionList):
+                if index>=limit:
+                    break
+                msg=f"{index+1:4d}/{total:4d}:getting cities for {region.name} {region.iso} {region.wikidataid}"
+                jsonFileName=f"{cachePath}/{region.iso}.json"
+                if os.path.isfile(jsonFileName):
+                    if showDone:
+                        print(msg)
+                else:
+                    futures.append(executor.submit(self.cacheRegionCities,wd,region.wikidataid,jsonFileName,msg))
+            for future in as_completed(futures):
                 try:
-                    regionCities=wd.getCitiesForRegion(regionId, msg)
-                    jsonStr=json.dumps(regionCities)
-                    with open(jsonFileName,"w") as jsonFile:
-                        jsonFile.write(jsonStr)
+                    future.result()
                 except Exception as ex:
-                    self.handleWikidataException(ex)
+                    try:
+                        self.handleWikidataException(ex)
+                    except Exception:
+                        # stop at the first real failure - the executor would otherwise wait for all queued queries on exit
+                        for pendingFuture in futures:
+                            pendingFuture.cancel()
+                        raise
                     
+    def cacheRegionCities(self,wd:Wikidata,regionId:str,jsonFileName:str,msg:str,retries:int=3):
+        '''
+        query the cities of the given region and store them in the given JSON file
+        retry with jittered exponential backoff since parallel queries may be throttled
+        
+        Args:
+            wd(Wikidata): the Wikidata access to use
+            regionId(str): the wikidata id of the region
+            jsonFileName(str): the name of the JSON file to write
+            msg(str): the profile message to display
+            retries(int): the maximum number of attempts
+        '''
+        regionCities=wd.getCitiesForRegion(regionId, msg, retries=retries)
+        with open(jsonFileName,"wb") as jsonFile:
+            jsonFile.write(dump_json(regionCities))
 
     def testGetCitiesByRegion(self):
         '''
@@ -94,8 +123,8 @@ class TestCachingCitiesByRegion(Geograpy3Test):
             else:
                 rIso=isoMatch.group(1)
                 region=regionByIso[rIso]
-                with open(jsonFileName) as jsonFile:
-                    cities4Region = json.load(jsonFile)
+                with open(jsonFileName,"rb") as jsonFile:
+                    cities4Region = load_json(jsonFile.read())
                     for city4Region in cities4Region:
                         city=City()
                         city.fromDict(city4Region)
@@ -5,6 +5,7 @@ Created on 2021-08-17
 '''
 import math
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from lodstorage.sql import SQLDB
 from tests.basetest import Geograpy3Test
 from geograpy.locator import RegionManager, LocationContext, CountryManager, CityManager
@@ -43,21 +44,20 @@ class TestCachingLocationLabels(Geograpy3Test):
                 wikidataIdQueryRes = sqlDb.query(wikidataIdQuery)
                 wikidataIds = [l['wikidataid'] for l in wikidataIdQueryRes]
 
-                chunkSize=1000
+                chunkSize=2500
                 iterations = math.ceil(len(wikidataIds) / chunkSize)
-                progress = 0
-                res=[]
-                for i in range(iterations):
+
+                def queryLabels(i:int):
                     workOnIds = wikidataIds[i * chunkSize:(i + 1) * chunkSize]
-                    progress += len(workOnIds)
-                    index = 0
-                    values = ""
-                    for location in workOnIds:
-                        spacer = "  \n\t\t\t" if index % 10 == 0 else " "
-                        values += f"{spacer}wd:{wd.getWikidataId(location)}"
-                        index += 1
+                    values = " ".join([f"wd:{wd.getWikidataId(location)}" for location in workOnIds])
                     query = self.getLablesQuery(values)
-                    res.extend(wd.query(f"Query {i}/{iterations} - Querying {manager.entityName} Labels", queryString=query))
+                    return wd.query(f"Query {i}/{iterations} - Querying {manager.entityName} Labels", queryString=query)
+
+                res=[]
+                # the chunks are disjoint so they can be queried in parallel - map keeps the chunk order
+                with ThreadPoolExecutor(max_workers=4) as executor:
+                    for chunkResult in executor.map(queryLabels, range(iterations)):
+                        res.extend(chunkResult)
                 wd.store2DB(res, tableName=f"{manager.entityName}_labels", sqlDB=sqlDb)
             self.createViews(sqlDB=sqlDb)
 
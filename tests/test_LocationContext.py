@@ -5,6 +5,7 @@ Created on 2021-08-13
 '''
 import tempfile
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 
 from lodstorage.storageconfig import StorageConfig
 
@@ -48,7 +49,7 @@ class TestLocationContext(Geograpy3Test):
         self.assertTrue(len(countryManager.countries) >= 200)
         # check if California is in the list
         countriesByWikidataId=self.checkNoDuplicateWikidataIds(countryManager,"wikidataid")
-        self.assertTrue("Q30" in countriesByWikidataId)
+        self.assertIn("Q30", countriesByWikidataId)
         
     def testRegionManager(self):
         '''
@@ -59,7 +60,7 @@ class TestLocationContext(Geograpy3Test):
         self.assertTrue(hasattr(regionManager,'regions'))
         self.assertTrue(len(regionManager.regions) >= 1000)
         regionsByWikidataId = self.checkNoDuplicateWikidataIds(regionManager,"wikidataid",54)
-        self.assertTrue("Q99" in regionsByWikidataId)
+        self.assertIn("Q99", regionsByWikidataId)
 
         
     def testCityManager(self):
@@ -73,7 +74,7 @@ class TestLocationContext(Geograpy3Test):
         # check if Los Angeles is in the list (popular city should always be in the list)
         _citiesByWikiDataIdNoDuplicates = self.checkNoDuplicateWikidataIds(cityManager,"wikidataid",304000)   # ToDo: Reduce number of duplicates
         citiesByWikiDataId=cityManager.getLookup("wikidataid", withDuplicates=True)
-        self.assertTrue("Q65" in citiesByWikiDataId)
+        self.assertIn("Q65", citiesByWikiDataId)
         
     def testLocationContextFromCache(self):
         '''
@@ -88,6 +89,20 @@ class TestLocationContext(Geograpy3Test):
             self.assertTrue(len(locationContext.cities) > 1000000)
 
 
+    def testLookupDBReuse(self):
+        '''
+        test that name lookups reuse the connection of the current thread
+        '''
+        locationContext = LocationContext.fromCache()
+        cityManager = locationContext.cityManager
+        sqldb = cityManager.getLookupDB()
+        self.assertIs(sqldb, cityManager.getLookupDB())
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            otherSqldb = executor.submit(cityManager.getLookupDB).result()
+        self.assertIsNot(sqldb, otherSqldb)
+        cities = cityManager.getByName("Los Angeles")
+        self.assertIn("Q65", [city.wikidataid for city in cities])
+
     def testIssue_59_db_download(self):
         '''
         tests if the cache database is downloaded if not present
@@ -5,8 +5,9 @@ Created on 2021-06-09
 '''
 import unittest
 import numpy as np
-from geograpy.locator import Locator, LocationManager, CityManager, CountryManager, RegionManager, Country, LocationContext
+from geograpy.locator import Locator, LocationManager, CityManager, CountryManager, RegionManager, Country, City, LocationContext, Earth
 from sklearn.neighbors import BallTree
+from lodstorage.storageconfig import StorageConfig
 
 from math import radians
 from tests.basetest import Geograpy3Test
@@ -86,6 +87,108 @@ class TestLocationHierarchy(Geograpy3Test):
         countryListWithDistances = country.getLocationsWithinRadius(lookupCountryManager, 300)
         self.checkLocationListWithDistances(countryListWithDistances, 2, "Luxembourg", 244)
 
+    def getLocationManager(self, managerClass, locationClass, records:list):
+        '''
+        get an in memory location manager for the given records without a connection to the cache database
+        
+        Args:
+            managerClass(class): the LocationManager class e.g. CityManager
+            locationClass(class): the Location class e.g. City
+            records(list): the keyword arguments of the locations to add
+        '''
+        locationManager = managerClass(config=StorageConfig.getJSON())
+        for record in records:
+            locationManager.add(locationClass(**record))
+        return locationManager
+
+    def testAngularDistances(self):
+        '''
+        test the vectorized haversine distances against the scalar distance function
+        '''
+        lookupCountryManager = self.getLocationManager(CountryManager, Country, [
+            {"name": "France", "lat": 46.0, "lon": 2.0},
+            {"name": "Luxembourg", "lat": 49.77, "lon": 6.13},
+            {"name": "Nowhere", "lat": None, "lon": None}])
+        country = Country(name="Germany", lat=51.0, lon=9.0)
+        columns = lookupCountryManager.getColumns()
+        self.assertEqual(["France", "Luxembourg", "Nowhere"], list(columns["name"]))
+        self.assertTrue(np.isnan(columns["lat"][2]))
+        distances, validList = lookupCountryManager.getAngularDistances(country.lat, country.lon)
+        self.assertEqual(2, len(validList))
+        for distance, location in zip(distances, validList):
+            self.assertAlmostEqual(country.distance(location), distance * Earth.radius, delta=0.001)
+        countryListWithDistances = country.getNClosestLocations(lookupCountryManager, 1)
+        self.checkLocationListWithDistances(countryListWithDistances, 2, "Luxembourg", 245)
+
+    def testBallTupleCache(self):
+        '''
+        test that the ball tree is reused until the location list changes
+        and that the batched closest location query matches the single queries
+        '''
+        lookupCountryManager = self.getLocationManager(CountryManager, Country, [
+            {"name": "France", "lat": 46.0, "lon": 2.0},
+            {"name": "Luxembourg", "lat": 49.77, "lon": 6.13},
+            {"name": "Poland", "lat": 52.0, "lon": 19.0}])
+        ballTuple = lookupCountryManager.getBallTuple()
+        self.assertIs(ballTuple, lookupCountryManager.getBallTuple())
+        countries = list(lookupCountryManager.getList())
+        closestCountries = lookupCountryManager.getNClosestLocationsFor(countries, 1)
+        for country, locationListWithDistances in zip(countries, closestCountries):
+            expected = country.getNClosestLocations(lookupCountryManager, 1)
+            self.assertEqual([location.name for location, _distance in expected], [location.name for location, _distance in locationListWithDistances])
+        country = Country(name="Germany", lat=51.0, lon=9.0)
+        lookupCountryManager.add(country)
+        _ballTree, validList = lookupCountryManager.getBallTuple()
+        self.assertEqual(4, len(validList))
+        # query locations without coordinates get no result instead of failing the batch
+        nowhere = Country(name="Nowhere")
+        closestCountries = lookupCountryManager.getNClosestLocationsFor([nowhere, country], 1)
+        self.assertEqual([], closestCountries[0])
+        self.assertEqual(1, len(closestCountries[1]))
+
+    def testRecordDuplicates(self):
+        '''
+        test detecting locations with the same name and coordinates under different wikidataids
+        '''
+        cityManager = self.getLocationManager(CityManager, City, [
+            {"wikidataid": "Q64", "name": "Berlin", "lat": 52.516667, "lon": 13.383333},
+            {"wikidataid": "Q64", "name": "Berlin", "lat": 52.516667, "lon": 13.383333},
+            {"wikidataid": "Q1", "name": "Berlin", "lat": 52.51667, "lon": 13.38333},
+            {"wikidataid": "Q2", "name": "Berlin", "lat": None, "lon": None},
+            {"wikidataid": "Q3", "name": "Paris", "lat": 52.516667, "lon": 13.383333}])
+        duplicates = cityManager.getRecordDuplicates()
+        self.assertEqual(["Q1"], [city.wikidataid for city in duplicates])
+
+    def testSimilarlyNamed(self):
+        '''
+        test finding locations by a similar name
+        '''
+        cityManager = self.getLocationManager(CityManager, City, [
+            {"wikidataid": "Q656", "name": "Saint Petersburg"},
+            {"wikidataid": "Q1490", "name": "Tokyo"},
+            {"wikidataid": "Q1741", "name": "Vienna"},
+            {"wikidataid": "Q3", "name": None}])
+        for name, expected in [("St. Petersburg", "Q656"), ("Viena", "Q1741"), ("Tōkyō", "Q1490")]:
+            similarCities = cityManager.getSimilarlyNamed(name, threshold=0.3)
+            if self.debug:
+                print(f"{name}:{similarCities}")
+            self.assertEqual(expected, similarCities[0][0].wikidataid)
+        self.assertEqual([], cityManager.getSimilarlyNamed("Xyz"))
+
+    def testInternForeignKeys(self):
+        '''
+        test that the region and country ids of cities share a single str object per id
+        '''
+        # the region ids are built at runtime so that they are distinct str objects before interning
+        cityManager = self.getLocationManager(CityManager, City, [
+            {"wikidataid": "Q65", "regionId": "".join(["Q", "99"]), "countryId": None},
+            {"wikidataid": "Q16552", "regionId": "".join(["Q", "99"]), "countryId": None}])
+        cities = cityManager.getList()
+        for city in cities:
+            cityManager.internForeignKeys(city)
+        self.assertIs(cities[0].regionId, cities[1].regionId)
+        self.assertIsNone(cities[0].countryId)
+
     def testRegionMatching(self):
         '''
         test region matches
@@ -97,8 +200,8 @@ class TestLocationHierarchy(Geograpy3Test):
         config=LocationContext.getDefaultConfig()
         regionManager=RegionManager(config=config)
         regionManager.fromCache()
-        for country in countryList.countries:
-            locationListWithDistances = country.getNClosestLocations(regionManager, 3)
+        closestRegions = regionManager.getNClosestLocationsFor(countryList.countries, 3)
+        for country, locationListWithDistances in zip(countryList.countries, closestRegions):
             if self.debug:
                 print(f"{country}{country.lat:.2f},{country.lon:.2f}")
             for i, locationWithDistance in enumerate(locationListWithDistances):
@@ -188,7 +291,9 @@ class TestLocationHierarchy(Geograpy3Test):
         # test interlinking of city with region and country
         locationContext = self.getLocationContext()
         cities = locationContext.cityManager.getByName('Los Angeles')
-        la = [x for x in cities if x.wikidataid == "Q65"][0]
+        citiesByWikidataId = {city.wikidataid: city for city in cities}
+        self.assertIn("Q65", citiesByWikidataId)
+        la = citiesByWikidataId["Q65"]
         self.assertEqual(la.name, 'Los Angeles')
         ca = la.region
         self.assertEqual(ca.name, 'California')
@@ -16,6 +16,7 @@ from geograpy.locator import Locator, City,CountryManager, Location, LocationCon
 from collections import Counter
 from lodstorage.uml import UML
 import re
+import numpy as np
 from tests.basetest import Geograpy3Test
 
 class TestLocator(Geograpy3Test):
@@ -23,8 +24,25 @@ class TestLocator(Geograpy3Test):
     test the Locator class from the location module
     '''   
     
+    @classmethod
+    def setUpClass(cls):
+        '''
+        download and populate the database once for all tests of this class
+        '''
+        super().setUpClass()
+        Locator.resetInstance()
+        cls.loc=Locator.getInstance()
+        cls.loc.downloadDB()
+        cls.loc.populate_db()
+        
+    def setUp(self):
+        '''
+        reuse the Locator instance prepared in setUpClass
+        '''
+        super().setUp(resetLocator=False)
+        
     def lookupQuery(self,viewName,whereClause):
-        loc=Locator.getInstance()
+        loc=self.loc
         queryString=f"SELECT * FROM {viewName} where {whereClause} AND pop is not NULL ORDER by pop desc"
         lookupRecords=loc.sqlDB.query(queryString)
         return lookupRecords
@@ -48,7 +66,7 @@ class TestLocator(Geograpy3Test):
         '''
         test that the views are available
         '''
-        loc=Locator.getInstance()
+        loc=self.loc
         viewsMap=loc.sqlDB.getTableDict(tableType="view")
         for view in ["CityLookup","RegionLookup","CountryLookup"]:
             self.assertTrue(view in viewsMap)
@@ -83,7 +101,7 @@ class TestLocator(Geograpy3Test):
         '''
         test regular expression for iso codes
         '''
-        loc=Locator.getInstance()
+        loc=self.loc
         self.assertFalse(loc.isISO('Singapore'))   
          
         query="""
@@ -91,7 +109,6 @@ select distinct iso from countries
 union 
 select distinct iso from regions
 """     
-        loc.populate_db()
         isocodeRecords=loc.sqlDB.query(query)
         for isocodeRecord in isocodeRecords:
             isocode=isocodeRecord['iso']
@@ -105,26 +122,25 @@ select distinct iso from regions
         '''
         test the word count 
         '''
-        loc=Locator.getInstance()
+        loc=self.loc
         query="SELECT name from CITIES"
         nameRecords=loc.sqlDB.query(query)
         if self.debug:
             print ("testWordCount: found %d names" % len(nameRecords))
-        wc=Counter()
-        for nameRecord in nameRecords:
-            name=nameRecord['name']
-            words=re.split(r"\W+",name)
-            wc[len(words)]+=1
+        # bind the split of the compiled pattern once instead of looking it up per name
+        splitWords=re.compile(r"\W+").split
+        wordCounts=np.fromiter((len(splitWords(nameRecord['name'])) for nameRecord in nameRecords),dtype=np.int64,count=len(nameRecords))
+        # histogram of the number of words per name
+        wc=np.bincount(wordCounts)
         if self.debug:
-            print ("most common 20: %s" % wc.most_common(20))
+            mostCommon=[(int(words),int(wc[words])) for words in np.argsort(wc,kind="stable")[::-1][:20] if wc[words]>0]
+            print ("most common 20: %s" % mostCommon)
         
     def testUML(self):
         '''
         test adding population data from wikidata to GeoLite2 information
         '''
-        Locator.resetInstance()
-        loc=Locator.getInstance()  
-        loc.populate_db()
+        loc=self.loc
         user=getpass.getuser()
         if self.debug:
             print ("current user is %s" % user)
@@ -249,8 +265,7 @@ February 3-5, 2020''']
         '''
         test the delimiter statistics for names
         '''
-        loc=Locator.getInstance()
-        loc.populate_db()
+        loc=self.loc
         
         ddls=["DROP VIEW IF EXISTS allNames","""CREATE VIEW allNames as select name from countries
         union select name from regions
@@ -299,6 +314,67 @@ February 3-5, 2020''']
         countries=['US','NL','AT','US','US','US','US']
         self.checkExamples(examples, countries,debug=False)
 
+    def testLocateCities(self):
+        '''
+        test locating the cities for a batch of place lists
+        '''
+        loc=self.loc
+        placesList=[['Paris','US-TX'],['Amsterdam','Netherlands'],['Vienna','Austria'],['Austin','TX'],['zurich'],['Москва'],['Paris','']]
+        cities=loc.locateCities(placesList)
+        self.assertEqual(len(placesList),len(cities))
+        for places,city in zip(placesList,cities):
+            if self.debug:
+                print(f"{places}->{city}")
+            self.assertEqual(str(loc.locateCity(places)),str(city))
+        # names without latin letters fold to an empty string which must not match any city
+        self.assertEqual([],loc.cities_for_name(""))
+        
+    def testLocateCityMemoized(self):
+        '''
+        test that repeated lookups of the same normalized places are memoized
+        '''
+        loc=self.loc
+        city=loc.locateCity(["Paris","US-TX"])
+        hits=loc.locateCityRow.cache_info().hits
+        cachedCity=loc.locateCity([" Paris ","US-TX"])
+        self.assertEqual(hits+1,loc.locateCityRow.cache_info().hits)
+        # each caller gets its own objects so that the cached values can not be changed
+        self.assertIsNot(city,cachedCity)
+        self.assertEqual(str(city),str(cachedCity))
+        cities=loc.cities_for_name("Berlin")
+        cities.clear()
+        self.assertTrue(len(loc.cities_for_name("Berlin"))>0)
+        
+    def testMisspelledCity(self):
+        '''
+        test that misspelled city names are found by the most similar known names if correctMisspelling is set
+        '''
+        self.assertIsNone(self.loc.locateCity(["Viena","Austria"]))
+        loc=Locator(correctMisspelling=True)
+        city=loc.locateCity(["Viena","Austria"])
+        self.assertEqual("Vienna",city.name)
+        self.assertEqual("AT",city.country.iso)
+        self.assertIsNone(loc.locateCity(["Xyzqw"]))
+        
+    def testResetInstance(self):
+        '''
+        test that resetting keeps a populated instance for reuse with cleared caches
+        '''
+        # restore the shared singleton state for the other tests
+        self.addCleanup(setattr,Locator,"locator",Locator.locator)
+        self.addCleanup(setattr,Locator,"reusableLocator",Locator.reusableLocator)
+        loc=Locator.getInstance()
+        loc.getCountry("Germany")
+        Locator.resetInstance()
+        reusedLoc=Locator.getInstance()
+        self.assertIs(loc,reusedLoc)
+        self.assertEqual(0,reusedLoc.getCountry.cache_info().currsize)
+        Locator.resetInstance()
+        otherLoc=Locator.getInstance(correctMisspelling=True)
+        self.assertIsNot(loc,otherLoc)
+        self.assertTrue(otherLoc.correctMisspelling)
+        Locator.resetInstance()
+        
     def testIssue41_CountriesFromErdem(self):
         '''
         test getting Country list from Erdem
@@ -4,12 +4,15 @@ Created on 2020-09-23
 @author: wf
 '''
 import unittest
+import socket
+import urllib.error
 from geograpy.wikidata import Wikidata
 from geograpy.locator import Country
 import getpass
 from tests.basetest import Geograpy3Test
 from lodstorage.sql import SQLDB
 from lodstorage.storageconfig import StorageConfig
+from SPARQLWrapper.SPARQLExceptions import EndPointInternalError, QueryBadFormed
 
 class TestWikidata(Geograpy3Test):
     '''
@@ -139,6 +142,18 @@ class TestWikidata(Geograpy3Test):
             self.assertEqual(expLat, lat)
             self.assertEqual(expLon, lon)
 
+    def testIsTransientError(self):
+        '''
+        test that only throttling, server errors and timeouts are retried
+        '''
+        throttled=urllib.error.HTTPError("https://query.wikidata.org/sparql",429,"Too Many Requests",None,None)
+        self.assertTrue(Wikidata.isTransientError(throttled))
+        self.assertTrue(Wikidata.isTransientError(EndPointInternalError()))
+        self.assertTrue(Wikidata.isTransientError(urllib.error.URLError(socket.timeout("timed out"))))
+        self.assertFalse(Wikidata.isTransientError(QueryBadFormed()))
+        with self.assertRaises(ValueError):
+            Wikidata().query("no attempt","SELECT * WHERE { ?s ?p ?o }",retries=0)
+
 if __name__ == "__main__":
     #import sys;sys.argv = ['', 'Test.testName']
     unittest.main()